@@ -40,11 +40,12 @@ The module is intended for testing and reference, not production code.
 __version__ = '2022.12.22'
 
 import bz2
+import concurrent.futures
 import functools
 import gzip
 import io
 import lzma
-import struct
+import os
 import sys
 import zlib
 
@@ -52,6 +53,7 @@ import numpy
 
 try:
     import PIL as pillow
+    import PIL.Image
 except ImportError:
     pillow = None
 
@@ -75,11 +77,22 @@ try:
 except ImportError:
     brotli = None
 
+try:
+    import deflate
+except ImportError:
+    deflate = None
+
 try:
     import czifile
 except Exception:
     czifile = None
 
+try:
+    import isal
+    import isal.isal_zlib
+except ImportError:
+    isal = None
+
 try:
     import lz4
     import lz4.block
@@ -137,6 +150,11 @@ try:
 except ImportError:
     numcodecs = None
 
+try:
+    import numba
+except ImportError:
+    numba = None
+
 
 def version(astype=None, _versions_=[]):
     """Return detailed version information about test dependencies."""
@@ -146,6 +164,8 @@ def version(astype=None, _versions_=[]):
                 ('imagecodecs.py', __version__),
                 ('numpy', numpy.__version__),
                 ('zlib', zlib.ZLIB_VERSION),
+                ('isal', isal.__version__ if isal else 'n/a'),
+                ('deflate', deflate.__version__ if deflate else 'n/a'),
                 ('bz2', 'stdlib'),
                 ('lzma', getattr(lzma, '__version__', 'stdlib')),
                 ('blosc', blosc.__version__ if blosc else 'n/a'),
@@ -164,6 +184,7 @@ def version(astype=None, _versions_=[]):
                 ),
                 ('pillow', pillow.__version__ if pillow else 'n/a'),
                 ('numcodecs', numcodecs.__version__ if numcodecs else 'n/a'),
+                ('numba', numba.__version__ if numba else 'n/a'),
                 ('zarr', zarr.__version__ if zarr else 'n/a'),
                 ('tifffile', tifffile.__version__ if tifffile else 'n/a'),
                 ('czifile', czifile.__version__ if czifile else 'n/a'),
@@ -210,11 +231,123 @@ def notimplemented(arg=False):
     return nop
 
 
+def jit(arg=None, **kwargs):
+    """Return function decorator that compiles function with Numba if present.
+
+    Without Numba, the function is returned unchanged and runs as Python.
+
+    >>> @jit
+    ... def test(a): return a + 1
+    >>> test(1)
+    2
+
+    """
+
+    def wrapper(func):
+        if numba is None:
+            return func
+        return numba.njit(**kwargs)(func)
+
+    if callable(arg):
+        return wrapper(arg)
+    return wrapper
+
+
+def _output_size(out):
+    """Return size in bytes of output buffer or -1 if size is unknown.
+
+    An integer out specifies the expected size of the output.
+
+    """
+    if out is None or out is bytes or out is bytearray:
+        return -1
+    if isinstance(out, int):
+        return out if out > 0 else -1
+    return memoryview(out).nbytes
+
+
+def _write_output(out, data):
+    """Return decoded data, copied to output buffer if provided.
+
+    If the output buffer is larger than data, return a view of the
+    used part of the buffer.
+
+    """
+    if out is None or out is bytes or isinstance(out, int):
+        return data
+    if out is bytearray:
+        return bytearray(data)
+    view = memoryview(out).cast('B')
+    size = len(data)
+    view[:size] = data
+    if size >= view.nbytes:
+        return out
+    if isinstance(out, numpy.ndarray):
+        return out.reshape(-1).view('u1')[:size]
+    return view[:size]
+
+
+def _decompress(decompressobj, data, outsize, error, multistream=False):
+    """Return data decompressed with new decompressor objects.
+
+    Raise RuntimeError if the decompressed data exceed outsize bytes or
+    error if the compressed data are incomplete.
+    If multistream, decode concatenated streams like bz2 and lzma do.
+
+    """
+    result = b''
+    while True:
+        decompressor = decompressobj()
+        result += decompressor.decompress(data, outsize - len(result) + 1)
+        if len(result) > outsize:
+            raise RuntimeError(f'decompressed data exceed {outsize} bytes')
+        if not decompressor.eof:
+            raise error(
+                'compressed data ended before the end-of-stream marker '
+                'was reached'
+            )
+        data = decompressor.unused_data
+        if not multistream or not data:
+            return result
+
+
+def _decode_batch(decode, chunks, outs=None, numthreads=None, **kwargs):
+    """Return list of chunks decoded in a thread pool.
+
+    The decode function must release the GIL to benefit from threading.
+
+    """
+    chunks = list(chunks)
+    if outs is None:
+        outs = [None] * len(chunks)
+    elif len(outs) != len(chunks):
+        raise ValueError('number of outputs does not match number of chunks')
+    if numthreads is None:
+        numthreads = os.cpu_count() or 1
+    numthreads = min(numthreads, len(chunks))
+    if numthreads < 2:
+        return [decode(c, out=o, **kwargs) for c, o in zip(chunks, outs)]
+
+    def func(chunk, out):
+        return decode(chunk, out=out, **kwargs)
+
+    with concurrent.futures.ThreadPoolExecutor(numthreads) as executor:
+        return list(executor.map(func, chunks, outs))
+
+
 def none_decode(data, *args, **kwargs):
-    """Decode NOP."""
+    """Decode NOP.
+
+    Callers may compare a codec against `none_decode` or `identity` and
+    skip the function call for the NOP codec.
+
+    """
     return data
 
 
+identity = none_decode
+
+
 def none_encode(data, *args, **kwargs):
     """Encode NOP."""
     return data
@@ -257,18 +390,22 @@ def delta_encode(data, axis=-1, dist=1, out=None):
 
     if isinstance(data, (bytes, bytearray)):
         data = numpy.frombuffer(data, dtype='u1')
-        diff = numpy.diff(data, axis=0)
-        return numpy.insert(diff, 0, data[0]).tobytes()
+        diff = numpy.empty_like(data)
+        diff[:1] = data[:1]
+        numpy.subtract(data[1:], data[:-1], out=diff[1:])
+        return diff.tobytes()
 
     dtype = data.dtype
     if dtype.kind == 'f':
-        data = data.view(f'{dtype.byteorder}u{dtype.itemsize}')  #
+        data = data.view(f'{dtype.byteorder}u{dtype.itemsize}')
 
-    diff = numpy.diff(data, axis=axis)
-    key = [slice(None)] * data.ndim
-    key[axis] = 0
-    diff = numpy.insert(diff, 0, data[tuple(key)], axis=axis)
-    diff = diff if data.dtype.isnative else diff.byteswap(True).newbyteorder()
+    key, key0, key1 = _delta_keys(data.ndim, axis)
+    if out is None:
+        diff = numpy.empty_like(data)
+    else:
+        diff = out.view(data.dtype)
+    diff[key] = data[key]
+    numpy.subtract(data[key0], data[key1], out=diff[key0])
 
     if dtype.kind == 'f':
         return diff.view(dtype)
@@ -288,9 +425,41 @@ def delta_decode(data, axis=-1, dist=1, out=None):
         out = None
     if isinstance(data, (bytes, bytearray)):
         data = numpy.frombuffer(data, dtype='u1')
-        return numpy.cumsum(data, axis=0, dtype='u1', out=out).tobytes()
-    out = numpy.cumsum(data, axis=axis, dtype=data.dtype, out=out)
-    return out if data.dtype.isnative else out.byteswap(True).newbyteorder()
+        return delta_decode(data, axis=0, out=out).tobytes()
+
+    dtype = data.dtype
+    if dtype.kind == 'f':
+        data = data.view(f'{dtype.byteorder}u{dtype.itemsize}')
+    if out is None:
+        out = numpy.empty_like(data)
+    else:
+        out = out.view(data.dtype)
+    if (
+        numba is not None
+        and data.ndim == 1
+        and data.dtype.kind in 'ui'
+        and data.dtype.itemsize <= 2
+        and data.dtype.isnative
+        and data.flags.c_contiguous
+        and out.flags.c_contiguous
+    ):
+        # NumPy's cumsum is slow for small integer types
+        _delta_decode(data, out)
+    else:
+        numpy.cumsum(data, axis=axis, dtype=data.dtype, out=out)
+    return out.view(dtype)
+
+
+@jit(cache=True, boundscheck=False)
+def _delta_decode(src, dst):
+    """Write cumulative sum of 1D src to dst, wrapping around on overflow."""
+    if src.size == 0:
+        return
+    acc = src[0]
+    dst[0] = acc
+    for i in range(1, src.size):
+        acc += src[i]
+        dst[i] = acc
 
 
 def xor_encode(data, axis=-1, out=None):
@@ -302,34 +471,39 @@ def xor_encode(data, axis=-1, out=None):
     """
     if isinstance(data, (bytes, bytearray)):
         data = numpy.frombuffer(data, dtype='u1')
-        xor = numpy.bitwise_xor(data[1:], data[:-1])
-        return numpy.insert(xor, 0, data[0]).tobytes()
+        xor = numpy.empty_like(data)
+        xor[:1] = data[:1]
+        numpy.bitwise_xor(data[1:], data[:-1], out=xor[1:])
+        return xor.tobytes()
 
     dtype = data.dtype
     if dtype.kind == 'f':
         data = data.view(f'u{dtype.itemsize}')
 
-    key = [slice(None)] * data.ndim
-    key[axis] = 0
-    key0 = [slice(None)] * data.ndim
-    key0[axis] = slice(1, None, None)
-    key1 = [slice(None)] * data.ndim
-    key1[axis] = slice(0, -1, None)
-
-    key = tuple(key)
-    key0 = tuple(key0)
-    key1 = tuple(key1)
-
-    xor = numpy.bitwise_xor(data[key0], data[key1])
-    xor = numpy.insert(xor, 0, data[key], axis=axis)
+    key, key0, key1 = _delta_keys(data.ndim, axis)
+    if out is None:
+        xor = numpy.empty_like(data)
+    else:
+        xor = out.view(data.dtype)
+    xor[key] = data[key]
+    numpy.bitwise_xor(data[key0], data[key1], out=xor[key0])
 
     if dtype.kind == 'f':
         return xor.view(dtype)
-    elif not data.dtype.isnative:
-        xor = xor.byteswap(True).newbyteorder()
     return xor
 
 
+def _delta_keys(ndim, axis):
+    """Return keys to first, all but first, and all but last items in axis."""
+    key = [slice(None)] * ndim
+    key[axis] = slice(0, 1)
+    key0 = [slice(None)] * ndim
+    key0[axis] = slice(1, None)
+    key1 = [slice(None)] * ndim
+    key1[axis] = slice(0, -1)
+    return tuple(key), tuple(key0), tuple(key1)
+
+
 def xor_decode(data, axis=-1, out=None):
     r"""Decode XOR delta.
 
@@ -338,13 +512,18 @@ def xor_decode(data, axis=-1, out=None):
 
     """
     if isinstance(data, (bytes, bytearray)):
-        prev = data[0]
-        b = [chr(prev)]
-        for c in data[1:]:
-            prev = c ^ prev
-            b.append(chr(prev))
-        return ''.join(b).encode('latin1')
-    raise NotImplementedError
+        data = numpy.frombuffer(data, dtype='u1')
+        return numpy.bitwise_xor.accumulate(data).tobytes()
+
+    # XOR is bytewise, so the byte order of the unsigned view is irrelevant
+    dtype = data.dtype
+    if out is None or not out.flags.writeable:
+        out = numpy.empty_like(data)
+    utype = f'{dtype.byteorder}u{dtype.itemsize}'
+    numpy.bitwise_xor.accumulate(
+        data.view(utype), axis=axis, out=out.view(utype)
+    )
+    return out
 
 
 def floatpred_decode(data, axis=-2, dist=1, out=None):
@@ -375,21 +554,53 @@ def floatpred_decode(data, axis=-2, dist=1, out=None):
     littleendian = data.dtype.byteorder == '<' or (
         sys.byteorder == 'little' and data.dtype.byteorder == '='
     )
+    if (
+        numba is not None
+        and dtype.char == 'f'
+        and littleendian
+        and data.flags.c_contiguous
+        and (out is None or out.flags.c_contiguous)
+    ):
+        # undo differencing and reorder bytes of rows in one parallel pass
+        if out is None:
+            out = numpy.empty(shape, dtype)
+        nrows = int(numpy.prod(shape[:-2]))
+        _floatpred_decode_f4le(
+            data.view('uint8').reshape(nrows, 4 * shape[-2], shape[-1]),
+            out.view('uint8').reshape(nrows, shape[-2], shape[-1], 4),
+        )
+        return out
     # undo horizontal byte differencing
-    data = data.view('uint8')
-    data.shape = shape[:-2] + (-1,) + shape[-1:]
+    data = data.view('uint8').reshape(shape[:-2] + (-1,) + shape[-1:])
     numpy.cumsum(data, axis=-2, dtype='uint8', out=data)
-    # reorder bytes
+    data = data.reshape(shape[:-2] + (dtype.itemsize,) + shape[-2:])
+    # reorder bytes directly into output via a strided view of the output
+    if out is None:
+        out = numpy.empty(shape, dtype)
+    view = out.view('uint8').reshape(shape + (dtype.itemsize,))
+    view = numpy.moveaxis(view, -1, -3)
     if littleendian:
-        data.shape = shape[:-2] + (-1,) + shape[-2:]
-    data = numpy.swapaxes(data, -3, -2)
-    data = numpy.swapaxes(data, -2, -1)
-    data = data[..., ::-1]
-    # back to float
-    data = numpy.ascontiguousarray(data)
-    data = data.view(dtype)
-    data.shape = shape
-    return data
+        view = view[..., ::-1, :, :]
+    view[...] = data
+    return out
+
+
+@jit(cache=True, parallel=True, boundscheck=False)
+def _floatpred_decode_f4le(src, dst):
+    """Decode rows of byte differenced float32 planes to little-endian.
+
+    The shape of src is (rows, 4 * width, samples) and of dst is
+    (rows, width, samples, 4).
+
+    """
+    nrows, width, nsamples = dst.shape[:3]
+    for y in numba.prange(nrows):
+        for c in range(nsamples):
+            acc = 0
+            for b in range(4):
+                for x in range(width):
+                    acc += src[y, b * width + x, c]
+                    dst[y, x, c, 3 - b] = acc
 
 
 @notimplemented
@@ -397,7 +608,28 @@ def floatpred_encode(data, axis=-1, dist=1, out=None):
     """Encode Floating Point Predictor."""
 
 
-def bitorder_decode(data, out=None, _bitorder=[]):
+_BITORDER_BYTES = (
+    b'\x00\x80@\xc0 \xa0`\xe0\x10\x90P\xd00\xb0p\xf0\x08\x88H\xc8('
+    b'\xa8h\xe8\x18\x98X\xd88\xb8x\xf8\x04\x84D\xc4$\xa4d\xe4\x14'
+    b'\x94T\xd44\xb4t\xf4\x0c\x8cL\xcc,\xacl\xec\x1c\x9c\\\xdc<\xbc|'
+    b'\xfc\x02\x82B\xc2"\xa2b\xe2\x12\x92R\xd22\xb2r\xf2\n\x8aJ\xca*'
+    b'\xaaj\xea\x1a\x9aZ\xda:\xbaz\xfa\x06\x86F\xc6&\xa6f\xe6\x16'
+    b'\x96V\xd66\xb6v\xf6\x0e\x8eN\xce.\xaen\xee\x1e\x9e^\xde>\xbe~'
+    b'\xfe\x01\x81A\xc1!\xa1a\xe1\x11\x91Q\xd11\xb1q\xf1\t\x89I\xc9)'
+    b'\xa9i\xe9\x19\x99Y\xd99\xb9y\xf9\x05\x85E\xc5%\xa5e\xe5\x15'
+    b'\x95U\xd55\xb5u\xf5\r\x8dM\xcd-\xadm\xed\x1d\x9d]\xdd=\xbd}'
+    b'\xfd\x03\x83C\xc3#\xa3c\xe3\x13\x93S\xd33\xb3s\xf3\x0b\x8bK'
+    b'\xcb+\xabk\xeb\x1b\x9b[\xdb;\xbb{\xfb\x07\x87G\xc7\'\xa7g\xe7'
+    b'\x17\x97W\xd77\xb7w\xf7\x0f\x8fO\xcf/\xafo\xef\x1f\x9f_'
+    b'\xdf?\xbf\x7f\xff'
+)
+_BITORDER_U8 = numpy.frombuffer(_BITORDER_BYTES, dtype='uint8')
+# reverse bits in both bytes of uint16 to halve the number of lookups
+_BITORDER_U16 = _BITORDER_U8[numpy.arange(65536) >> 8].astype('uint16') << 8
+_BITORDER_U16 |= _BITORDER_U8[numpy.arange(65536) & 255]
+
+
+def bitorder_decode(data, out=None):
     r"""Reverse bits in each byte of byte string or numpy array.
 
     Decode data where pixels with lower column values are stored in the
@@ -420,29 +652,22 @@ def bitorder_decode(data, out=None, _bitorder=[]):
     array([  128, 16473], dtype=uint16)
 
     """
-    if not _bitorder:
-        _bitorder.append(
-            b'\x00\x80@\xc0 \xa0`\xe0\x10\x90P\xd00\xb0p\xf0\x08\x88H\xc8('
-            b'\xa8h\xe8\x18\x98X\xd88\xb8x\xf8\x04\x84D\xc4$\xa4d\xe4\x14'
-            b'\x94T\xd44\xb4t\xf4\x0c\x8cL\xcc,\xacl\xec\x1c\x9c\\\xdc<\xbc|'
-            b'\xfc\x02\x82B\xc2"\xa2b\xe2\x12\x92R\xd22\xb2r\xf2\n\x8aJ\xca*'
-            b'\xaaj\xea\x1a\x9aZ\xda:\xbaz\xfa\x06\x86F\xc6&\xa6f\xe6\x16'
-            b'\x96V\xd66\xb6v\xf6\x0e\x8eN\xce.\xaen\xee\x1e\x9e^\xde>\xbe~'
-            b'\xfe\x01\x81A\xc1!\xa1a\xe1\x11\x91Q\xd11\xb1q\xf1\t\x89I\xc9)'
-            b'\xa9i\xe9\x19\x99Y\xd99\xb9y\xf9\x05\x85E\xc5%\xa5e\xe5\x15'
-            b'\x95U\xd55\xb5u\xf5\r\x8dM\xcd-\xadm\xed\x1d\x9d]\xdd=\xbd}'
-            b'\xfd\x03\x83C\xc3#\xa3c\xe3\x13\x93S\xd33\xb3s\xf3\x0b\x8bK'
-            b'\xcb+\xabk\xeb\x1b\x9b[\xdb;\xbb{\xfb\x07\x87G\xc7\'\xa7g\xe7'
-            b'\x17\x97W\xd77\xb7w\xf7\x0f\x8fO\xcf/\xafo\xef\x1f\x9f_'
-            b'\xdf?\xbf\x7f\xff'
-        )
-        _bitorder.append(numpy.frombuffer(_bitorder[0], dtype='uint8'))
     try:
         view = data.view('uint8')
-        numpy.take(_bitorder[1], view, out=view)
+        # indices are always in range; mode='clip' avoids buffering output
+        if view.ndim > 0 and view.shape[-1] > 1 and view.strides[-1] == 1:
+            if view.shape[-1] % 2:
+                numpy.take(
+                    _BITORDER_U8, view[..., -1], out=view[..., -1], mode='clip'
+                )
+                view = view[..., :-1]
+            view = view.view('uint16')
+            numpy.take(_BITORDER_U16, view, out=view, mode='clip')
+        else:
+            numpy.take(_BITORDER_U8, view, out=view, mode='clip')
         return data
     except AttributeError:
-        return data.translate(_bitorder[0])
+        return data.translate(_BITORDER_BYTES)
     except ValueError:
         raise NotImplementedError('slices of arrays not supported')
     return None
@@ -463,24 +688,204 @@ def packbits_decode(encoded, out=None):
     b'\xaa\xaa\xaa\x80\x00*\xaa\xaa\xaa\xaa\x80\x00*"\xaa\xaa\xaa\xaa\xaa\xaa'
 
     """
-    out = []
-    out_extend = out.extend
+    src = numpy.frombuffer(encoded, dtype='u1')
+    literal, runlen, srcidx = _packbits_ops(src.view('i1'))
+    size = int(runlen.sum())
+    if size == 0:
+        return b''
+    if numba is not None:
+        return _packbits_fill(src, literal, runlen, srcidx, size).tobytes()
+    # gather literals and replicate runs in one indexing operation
+    offsets = numpy.cumsum(runlen) - runlen
+    index = numpy.arange(size)
+    index -= numpy.repeat(offsets, runlen)
+    index *= numpy.repeat(literal, runlen)
+    index += numpy.repeat(srcidx, runlen)
+    return src[index].tobytes()
+
+
+@jit(cache=True)
+def _packbits_ops(ctrl):
+    """Return literal flag, length, and source index of PackBits operations.
+
+    Truncated literals are clipped to the end of the stream.
+
+    """
+    size = ctrl.size
+    literal = numpy.empty(size, numpy.bool_)
+    runlen = numpy.empty(size, numpy.int32)
+    srcidx = numpy.empty(size, numpy.int32)
     i = 0
-    try:
-        while True:
-            n = ord(encoded[i : i + 1]) + 1
+    j = 0
+    while i < size:
+        n = int(ctrl[i])
+        i += 1
+        if n == -128:
+            # NOP
+            continue
+        if n < 0:
+            # replicate
+            if i >= size:
+                break
+            literal[j] = False
+            runlen[j] = 1 - n
+            srcidx[j] = i
             i += 1
-            if n > 129:
+        else:
+            # literal
+            n = min(n + 1, size - i)
+            if n <= 0:
+                break
+            literal[j] = True
+            runlen[j] = n
+            srcidx[j] = i
+            i += n
+        j += 1
+    return literal[:j], runlen[:j], srcidx[:j]
+
+
+@jit(cache=True, boundscheck=False)
+def _packbits_fill(src, literal, runlen, srcidx, size):
+    """Return PackBits operations applied to new uint8 array of size bytes."""
+    dst = numpy.empty(size, numpy.uint8)
+    j = 0
+    for k in range(runlen.size):
+        n = runlen[k]
+        i = srcidx[k]
+        if literal[k]:
+            dst[j : j + n] = src[i : i + n]
+        else:
+            dst[j : j + n] = src[i]
+        j += n
+    return dst
+
+
+def packbits_encode(data, level=None, axis=None, out=None):
+    r"""Compress PackBits.
+
+    Arrays are encoded row by row along axis, merging trailing dimensions.
+
+    >>> packbits_encode(b'123')
+    b'\x02123'
+    >>> packbits_encode(
+    ...   b'\xaa\xaa\xaa\x80\x00*\xaa\xaa\xaa\xaa\x80\x00*"\xaa\xaa\xaa\xaa')
+    b'\xfe\xaa\x02\x80\x00*\xfd\xaa\x03\x80\x00*"\xfd\xaa'
+
+    """
+    if isinstance(data, numpy.ndarray):
+        data = numpy.ascontiguousarray(data)
+        if axis is None:
+            axis = data.ndim - 1
+        elif axis < 0:
+            axis = data.ndim + axis
+        if not 0 <= axis < data.ndim:
+            raise ValueError('invalid axis')
+        rowsize = data.itemsize * int(numpy.prod(data.shape[axis:]))
+        src = data.reshape(-1).view('u1')
+        src = src.reshape(-1, rowsize) if rowsize else src.reshape(0, 0)
+    else:
+        src = numpy.frombuffer(data, dtype='u1').reshape(1, -1)
+    nrows, rowsize = src.shape
+    dst = numpy.empty(nrows * (rowsize + (rowsize + 127) // 128), 'u1')
+    size = _packbits_encode(src, dst)
+    return _write_output(out, dst[:size].tobytes())
+
+
+@jit(cache=True, boundscheck=False)
+def _packbits_encode(src, dst):
+    """Encode rows of src to dst. Return number of bytes written to dst.
+
+    The size of dst must be at least the number of rows times the maximum
+    encoded length of a row.
+
+    """
+    nrows, srcsize = src.shape
+    maxsize = srcsize + (srcsize + 127) // 128
+    j = 0
+    for row in range(nrows):
+        s = src[row]
+        start = j
+        dstend = start + maxsize - 1
+        # start of last replicate run in row bounds the next replicate scan
+        lastrun = srcsize - 2
+        while lastrun >= 0 and s[lastrun] != s[lastrun + 1]:
+            lastrun -= 1
+        i = 0
+        while i < srcsize:
+            dup = _packbits_next_replicate(s, i, lastrun)
+            if dup == i:
                 # replicate
-                out_extend(encoded[i : i + 1] * (258 - n))
-                i += 1
-            elif n < 129:
-                # literal
-                out_extend(encoded[i : i + n])
+                n = _packbits_replicate_length(s, i, 128)
+                if j >= dstend:
+                    j = -1
+                    break
+                dst[j] = 257 - n
+                dst[j + 1] = s[i]
+                j += 2
                 i += n
-    except TypeError:
-        pass
-    return bytes(out)
+                continue
+            if dup < 0:
+                # no more replicate runs found
+                n = srcsize - i
+            else:
+                n = _packbits_replicate_length(s, dup, 3)
+                if n < 3:
+                    nextdup = _packbits_next_replicate(s, i + n, lastrun)
+                    if nextdup > i + n:
+                        # discard 2-byte run
+                        dup = nextdup
+                n = dup - i
+            # literal
+            n = min(128, n)
+            if j + n >= dstend:
+                j = -1
+                break
+            dst[j] = n - 1
+            dst[j + 1 : j + 1 + n] = s[i : i + n]
+            j += n + 1
+            i += n
+        if j < 0:
+            # encoding exceeded maximum literal-only length
+            # re-encode with only literal packets
+            j = start
+            i = 0
+            while i < srcsize:
+                n = min(128, srcsize - i)
+                dst[j] = n - 1
+                dst[j + 1 : j + 1 + n] = s[i : i + n]
+                j += n + 1
+                i += n
+    return j
+
+
+@jit(cache=True, boundscheck=False)
+def _packbits_next_replicate(src, i, lastrun):
+    """Return index of next replicate run at or after i, or -1.
+
+    Lastrun is the index of the last replicate run in src. Only the next
+    128 bytes are scanned, which suffice for a literal packet. If no run is
+    found there, return i + 128, a lower bound of the index of the run.
+
+    """
+    if i > lastrun:
+        return -1
+    value = src[i]
+    for k in range(i + 1, min(i + 129, src.size)):
+        if src[k] == value:
+            return k - 1
+        value = src[k]
+    return i + 128
+
+
+@jit(cache=True, boundscheck=False)
+def _packbits_replicate_length(src, i, maxlen):
+    """Return length of replicate run starting at i, at most maxlen."""
+    value = src[i]
+    end = min(src.size, i + maxlen)
+    k = i + 1
+    while k < end and src[k] == value:
+        k += 1
+    return k - i
 
 
 def lzw_decode(encoded, buffersize=0, out=None):
@@ -497,85 +902,224 @@ def lzw_decode(encoded, buffersize=0, out=None):
     b'say hammer yo hammer mc hammer go hammer'
 
     """
-    len_encoded = len(encoded)
-    bitcount_max = len_encoded * 8
-    unpack = struct.unpack
-    newtable = [bytes([i]) for i in range(256)]
-    newtable.extend((0, 0))
-
-    def next_code():
-        # return integer of 'bitw' bits at 'bitcount' position in encoded
-        start = bitcount // 8
-        s = encoded[start : start + 4]
-        try:
-            code = unpack('>I', s)[0]
-        except Exception:
-            code = unpack('>I', s + b'\x00' * (4 - len(s)))[0]
-        code <<= bitcount % 8
-        code &= mask
-        return code >> shr
-
-    switchbits = {  # code: bit-width, shr-bits, bit-mask
-        255: (9, 23, int(9 * '1' + '0' * 23, 2)),
-        511: (10, 22, int(10 * '1' + '0' * 22, 2)),
-        1023: (11, 21, int(11 * '1' + '0' * 21, 2)),
-        2047: (12, 20, int(12 * '1' + '0' * 20, 2)),
-    }
-    bitw, shr, mask = switchbits[255]
-    bitcount = 0
-
-    if len_encoded < 4:
+    if len(encoded) < 4:
         raise ValueError('strip must be at least 4 characters long')
-
-    if next_code() != 256:
+    if (encoded[0] << 1) | (encoded[1] >> 7) != 256:
         raise ValueError('strip must begin with CLEAR code')
 
+    if numba is not None:
+        src = numpy.frombuffer(encoded, dtype='u1')
+        if isinstance(out, int) and out > 0:
+            dstsize = out
+        else:
+            dstsize = len(encoded) * 8
+        while True:
+            dst = numpy.empty(dstsize, dtype='u1')
+            size = _lzw_decode(src, dst)
+            if size >= 0:
+                return dst[:size].tobytes()
+            dstsize *= 2
+
+    bitcount_max = len(encoded) * 8
+    # like imcd, ignore the third byte of codes starting in the last 24 bits
+    bitcount_last = bitcount_max - 24
+    # pad with zero bytes to read the last code without bounds checking
+    src = memoryview(bytes(encoded) + b'\x00\x00')
+    # the decoded output serves as arena for the string table: each entry
+    # above EOI is the slice result[starts[i] : ends[i]], which avoids
+    # allocating a bytes object per code
+    starts = [0] * 258
+    ends = [0] * 258
+    starts_append = starts.append
+    ends_append = ends.append
+
+    switchbits = {255: 9, 511: 10, 1023: 11, 2047: 12}  # code: bit-width
+    bitw = 9
+    bitcount = 0
+    # rolling accumulator holding the next 'nbits' unread bits of encoded
+    acc = 0
+    nbits = 0
+    pos = 0
+
     code = 0
-    oldcode = 0
-    result = []
+    prevstart = 0
+    prevend = 0
+    result = bytearray()
     result_append = result.append
     while True:
-        code = next_code()  # ~5% faster when inlining this function
+        while nbits < bitw:
+            acc = (acc << 8) | src[pos]
+            pos += 1
+            nbits += 8
+        nbits -= bitw
+        code = acc >> nbits
+        acc ^= code << nbits
+        if bitcount > bitcount_last:
+            k = bitcount >> 3
+            code = (src[k] << 16) | (src[k + 1] << 8)
+            code >>= 24 - bitw - (bitcount & 7)
+            code &= (1 << bitw) - 1
         bitcount += bitw
-        if code == 257 or bitcount >= bitcount_max:  # EOI
+        if code == 257 or bitcount > bitcount_max:  # EOI
             break
         if code == 256:  # CLEAR
-            table = newtable[:]
-            table_append = table.append
+            del starts[258:]
+            del ends[258:]
             lentable = 258
-            bitw, shr, mask = switchbits[255]
-            code = next_code()
-            bitcount += bitw
-            if code == 257:  # EOI
+            bitw = 9
+            while code == 256:  # skip repeated CLEAR codes
+                while nbits < bitw:
+                    acc = (acc << 8) | src[pos]
+                    pos += 1
+                    nbits += 8
+                nbits -= bitw
+                code = acc >> nbits
+                acc ^= code << nbits
+                if bitcount > bitcount_last:
+                    k = bitcount >> 3
+                    code = (src[k] << 16) | (src[k + 1] << 8)
+                    code >>= 24 - bitw - (bitcount & 7)
+                    code &= (1 << bitw) - 1
+                bitcount += bitw
+                if bitcount > bitcount_max:
+                    break
+            if code == 257 or bitcount > bitcount_max:  # EOI
                 break
-            result_append(table[code])
+            if code > 255:
+                raise ValueError('invalid LZW code')
+            prevstart = len(result)
+            result_append(code)
+            prevend = prevstart + 1
         else:
-            if code < lentable:
-                decoded = table[code]
-                newcode = table[oldcode] + decoded[:1]
+            if code < 256:
+                result_append(code)
+            elif code < lentable:
+                result += result[starts[code] : ends[code]]
+            elif code == lentable:
+                # table[oldcode] + its first byte
+                result += result[prevstart:prevend]
+                result_append(result[prevstart])
             else:
-                newcode = table[oldcode]
-                newcode += newcode[:1]
-                decoded = newcode
-            result_append(decoded)
-            table_append(newcode)
+                raise ValueError('invalid LZW code')
+            # append table[oldcode] + first byte of decoded, which follows
+            # table[oldcode] in the output
+            starts_append(prevstart)
+            ends_append(prevend + 1)
             lentable += 1
-        oldcode = code
+            prevstart = prevend
+            prevend = len(result)
         if lentable in switchbits:
-            bitw, shr, mask = switchbits[lentable]
+            bitw = switchbits[lentable]
 
     if code != 257:
         # logging.warning(f'unexpected end of LZW stream (code {code!r})')
         pass
 
-    return b''.join(result)
+    return bytes(result)
+
+
+@jit(cache=True, boundscheck=False)
+def _lzw_decode(src, dst):
+    """Decode LZW encoded src to dst.
+
+    Return the number of bytes written to dst or -1 if dst is too small.
+    Table entries are stored as start and length into a growable buffer.
+
+    """
+    dstsize = dst.size
+    tbl_start = numpy.zeros(4096, numpy.int32)
+    tbl_len = numpy.zeros(4096, numpy.int32)
+    buf = numpy.empty(65536, numpy.uint8)
+    for i in range(256):
+        buf[i] = i
+        tbl_start[i] = i
+        tbl_len[i] = 1
+    bufsize = 256
+    lentable = 258
+    bitw = 9
+    bitcount = 0
+    code = 0
+    oldcode = 0
+    j = 0
+    while True:
+        code = _lzw_next_code(src, bitcount, bitw)
+        bitcount += bitw
+        if code == 257:  # EOI
+            break
+        if code == 256:  # CLEAR
+            bufsize = 256
+            lentable = 258
+            bitw = 9
+            while code == 256:
+                code = _lzw_next_code(src, bitcount, bitw)
+                bitcount += bitw
+            if code == 257:  # EOI
+                break
+            if code > 255:
+                raise ValueError('invalid LZW code')
+            if j >= dstsize:
+                return -1
+            dst[j] = code
+            j += 1
+        else:
+            start = tbl_start[oldcode]
+            length = tbl_len[oldcode]
+            if code < lentable:
+                first = buf[tbl_start[code]]
+            elif code == lentable:
+                first = buf[start]
+            else:
+                raise ValueError('invalid LZW code')
+            if lentable < 4096:
+                # append table[oldcode] + first byte of decoded
+                if bufsize + length + 1 > buf.size:
+                    newbuf = numpy.empty(buf.size * 2, numpy.uint8)
+                    newbuf[:bufsize] = buf[:bufsize]
+                    buf = newbuf
+                buf[bufsize : bufsize + length] = buf[start : start + length]
+                buf[bufsize + length] = first
+                tbl_start[lentable] = bufsize
+                tbl_len[lentable] = length + 1
+                bufsize += length + 1
+                lentable += 1
+            start = tbl_start[code]
+            length = tbl_len[code]
+            if j + length > dstsize:
+                return -1
+            dst[j : j + length] = buf[start : start + length]
+            j += length
+        oldcode = code
+        if lentable == 511:
+            bitw = 10
+        elif lentable == 1023:
+            bitw = 11
+        elif lentable == 2047:
+            bitw = 12
+    return j
+
+
+@jit(cache=True, boundscheck=False)
+def _lzw_next_code(src, bitcount, bitw):
+    """Return code of bitw bits at bitcount position in src or EOI.
+
+    Like imcd, the third byte is only used if at least 24 bits are left.
+
+    """
+    srcbits = src.size * 8
+    if bitcount + bitw > srcbits:
+        return 257
+    pos = bitcount >> 3
+    word = (int(src[pos]) << 16) | (int(src[pos + 1]) << 8)
+    if bitcount + 24 <= srcbits:
+        word |= int(src[pos + 2])
+    return (word >> (24 - bitw - (bitcount & 7))) & ((1 << bitw) - 1)
 
 
 def packints_decode(data, dtype, bitspersample, runlen=0, out=None):
     """Decompress byte string to array of integers of any bit size <= 32.
 
-    This Python implementation is slow and only handles itemsizes 1, 2, 4, 8,
-    16, 32, and 64.
+    This Python implementation expands all input bits to bytes and is
+    therefore memory intensive.
 
     Parameters
     ----------
@@ -594,6 +1138,8 @@ def packints_decode(data, dtype, bitspersample, runlen=0, out=None):
     array([0, 1, 1, 0, 0, 0, 0, 1], dtype=uint8)
     >>> packints_decode(b'ab', 'B', 2)
     array([1, 2, 0, 1, 1, 2, 0, 2], dtype=uint8)
+    >>> packints_decode(b'abcd', 'u2', 12)
+    array([1558,  611], dtype=uint16)
 
     """
     if bitspersample == 1:  # bitarray
@@ -607,7 +1153,7 @@ def packints_decode(data, dtype, bitspersample, runlen=0, out=None):
     dtype = numpy.dtype(dtype)
     if bitspersample in (8, 16, 32, 64):
         return numpy.frombuffer(data, dtype)
-    if bitspersample not in (1, 2, 4, 8, 16, 32):
+    if not 0 < bitspersample < 32:
         raise ValueError(f'itemsize not supported: {bitspersample}')
     if dtype.kind not in 'bu':
         raise ValueError('invalid dtype')
@@ -617,31 +1163,24 @@ def packints_decode(data, dtype, bitspersample, runlen=0, out=None):
         raise ValueError('dtype.itemsize too small')
     if runlen == 0:
         runlen = (8 * len(data)) // bitspersample
+        if runlen == 0:
+            return numpy.empty((0,), dtype)
     skipbits = runlen * bitspersample % 8
     if skipbits:
         skipbits = 8 - skipbits
     shrbits = itembytes * 8 - bitspersample
-    bitmask = int(bitspersample * '1' + '0' * shrbits, 2)
-    dtypestr = '>' + dtype.char  # dtype always big-endian?
 
-    unpack = struct.unpack
-    size = runlen * (len(data) * 8 // (runlen * bitspersample + skipbits))
-    result = numpy.empty((size,), dtype)
-    bitcount = 0
-    for i in range(size):
-        start = bitcount // 8
-        s = data[start : start + itembytes]
-        try:
-            code = unpack(dtypestr, s)[0]
-        except Exception:
-            code = unpack(dtypestr, s + b'\x00' * (itembytes - len(s)))[0]
-        code <<= bitcount % 8
-        code &= bitmask
-        result[i] = code >> shrbits
-        bitcount += bitspersample
-        if (i + 1) % runlen == 0:
-            bitcount += skipbits
-    return result
+    # expand to bits, drop padding at end of runs, and left-pad each integer
+    # to itemsize bits before packing back to big-endian integers
+    runbits = runlen * bitspersample
+    nruns = len(data) * 8 // (runbits + skipbits)
+    bits = numpy.unpackbits(numpy.frombuffer(data, 'u1'))
+    bits = bits[: nruns * (runbits + skipbits)]
+    bits = bits.reshape(nruns, runbits + skipbits)[:, :runbits]
+    padded = numpy.zeros((nruns * runlen, itembytes * 8), 'u1')
+    padded[:, shrbits:] = bits.reshape(-1, bitspersample)
+    result = numpy.packbits(padded, axis=-1).view(f'>u{itembytes}')
+    return result.reshape(-1).astype(dtype)
 
 
 @notimplemented(bitshuffle)
@@ -670,8 +1209,44 @@ def zlib_encode(data, level=6, out=None):
 
 
 def zlib_decode(data, out=None):
-    """Decompress Zlib."""
-    return zlib.decompress(data)
+    """Decompress Zlib.
+
+    Use the faster isal or deflate (libdeflate) packages if installed.
+    Libdeflate requires the size of the output to be known.
+
+    """
+    zlib_ = isal.isal_zlib if isal else zlib
+    libdeflate = deflate if deflate and not isal else None
+    outsize = _output_size(out)
+    if libdeflate and outsize > 0:
+        try:
+            result = libdeflate.zlib_decompress(data, outsize)
+        except libdeflate.DeflateError:
+            # output too small or corrupt data: let zlib raise zlib.error
+            pass
+        else:
+            # libdeflate returns bytearray
+            if out is not bytearray:
+                result = bytes(result)
+            return _write_output(out, result)
+    try:
+        if outsize < 0:
+            result = zlib_.decompress(data)
+        else:
+            result = _decompress(
+                zlib_.decompressobj, data, outsize, zlib.error
+            )
+    except zlib_.error as exc:
+        if zlib_ is zlib:
+            raise
+        # isal raises IsalError, which is not derived from zlib.error
+        raise zlib.error(str(exc)) from exc
+    return _write_output(out, result)
+
+
+def zlib_decode_batch(chunks, outs=None, numthreads=None):
+    """Decompress sequence of Zlib chunks in parallel."""
+    return _decode_batch(zlib_decode, chunks, outs, numthreads)
 
 
 def deflate_encode(data, level=6, raw=False, out=None):
@@ -705,7 +1280,18 @@ def bz2_encode(data, level=9, out=None):
 
 def bz2_decode(data, out=None):
     """Decompress BZ2."""
-    return bz2.decompress(data)
+    outsize = _output_size(out)
+    if outsize < 0:
+        return _write_output(out, bz2.decompress(data))
+    result = _decompress(
+        bz2.BZ2Decompressor, data, outsize, ValueError, multistream=True
+    )
+    return _write_output(out, result)
+
+
+def bz2_decode_batch(chunks, outs=None, numthreads=None):
+    """Decompress sequence of BZ2 chunks in parallel."""
+    return _decode_batch(bz2_decode, chunks, outs, numthreads)
 
 
 @notimplemented(blosc)
@@ -736,7 +1322,19 @@ def blosc_encode(
 @notimplemented(blosc)
 def blosc_decode(data, out=None):
     """Decompress Blosc."""
-    return blosc.decompress(data)
+    return _write_output(out, blosc.decompress(data))
+
+
+@notimplemented(blosc)
+def blosc_decode_batch(chunks, outs=None, numthreads=None):
+    """Decompress sequence of Blosc chunks using Blosc's internal threads."""
+    if numthreads is None:
+        numthreads = os.cpu_count() or 1
+    previous = blosc.set_nthreads(numthreads)
+    try:
+        return _decode_batch(blosc_decode, chunks, outs, 1)
+    finally:
+        blosc.set_nthreads(previous)
 
 
 def lzma_encode(data, level=None, out=None):
@@ -746,7 +1344,18 @@ def lzma_encode(data, level=None, out=None):
 
 def lzma_decode(data, out=None):
     """Decompress LZMA."""
-    return lzma.decompress(data)
+    outsize = _output_size(out)
+    if outsize < 0:
+        return _write_output(out, lzma.decompress(data))
+    result = _decompress(
+        lzma.LZMADecompressor, data, outsize, lzma.LZMAError, multistream=True
+    )
+    return _write_output(out, result)
+
+
+def lzma_decode_batch(chunks, outs=None, numthreads=None):
+    """Decompress sequence of LZMA chunks in parallel."""
+    return _decode_batch(lzma_decode, chunks, outs, numthreads)
 
 
 @notimplemented(zstd)
@@ -758,7 +1367,13 @@ def zstd_encode(data, level=5, out=None):
 @notimplemented(zstd)
 def zstd_decode(data, out=None):
     """Decompress ZStandard."""
-    return zstd.decompress(data)
+    return _write_output(out, zstd.decompress(data))
+
+
+@notimplemented(zstd)
+def zstd_decode_batch(chunks, outs=None, numthreads=None):
+    """Decompress sequence of ZStandard chunks in parallel."""
+    return _decode_batch(zstd_decode, chunks, outs, numthreads)
 
 
 @notimplemented(brotli)
@@ -881,13 +1496,50 @@ def lz4_encode(data, level=1, header=False, out=None):
 
 @notimplemented(lz4)
 def lz4_decode(data, header=False, out=None):
-    """Decompress LZ4."""
+    """Decompress LZ4.
+
+    If `header` is False, the size of the decompressed data should be
+    passed in `out`, else the output size is found by trial and error.
+
+    """
+    return_bytearray = out is bytearray
     if header:
-        return lz4.block.decompress(data)
-    if isinstance(out, int):
-        return lz4.block.decompress(data, uncompressed_size=out)
-    outsize = max(24, 24 + 255 * (len(data) - 10))  # ugh
-    return lz4.block.decompress(data, uncompressed_size=outsize)
+        return _write_output(
+            out, lz4.block.decompress(data, return_bytearray=return_bytearray)
+        )
+    outsize = _output_size(out)
+    if outsize >= 0:
+        return _write_output(
+            out,
+            lz4.block.decompress(
+                data,
+                uncompressed_size=outsize,
+                return_bytearray=return_bytearray,
+            ),
+        )
+    # grow the output buffer up to the maximum LZ4 compression ratio
+    maxsize = max(24, 24 + 255 * (len(data) - 10))
+    outsize = min(max(64, len(data) * 4), maxsize)
+    while True:
+        try:
+            return _write_output(
+                out,
+                lz4.block.decompress(
+                    data,
+                    uncompressed_size=outsize,
+                    return_bytearray=return_bytearray,
+                ),
+            )
+        except lz4.block.LZ4BlockError:
+            if outsize >= maxsize:
+                raise
+            outsize = min(outsize * 2, maxsize)
+
+
+@notimplemented(lz4)
+def lz4_decode_batch(chunks, outs=None, numthreads=None, header=False):
+    """Decompress sequence of LZ4 chunks in parallel."""
+    return _decode_batch(lz4_decode, chunks, outs, numthreads, header=header)
 
 
 @notimplemented(tifffile)
@@ -911,7 +1563,20 @@ def tiff_encode(data, level=1, **kwargs):
 @notimplemented(pillow)
 def pil_decode(data, out=None):
     """Decode image data using Pillow."""
-    return numpy.asarray(pillow.Image.open(io.BytesIO(data)))
+    with pillow.Image.open(io.BytesIO(data)) as img:
+        # decode once; the array interface then exports the decoded buffer
+        img.load()
+        image = numpy.asarray(img)
+    if out is None:
+        return image
+    numpy.copyto(out, image)
+    return out
+
+
+@notimplemented(pillow)
+def pil_decode_batch(chunks, outs=None, numthreads=None):
+    """Decode sequence of images in parallel using Pillow."""
+    return _decode_batch(pil_decode, chunks, outs, numthreads)
 
 
 @notimplemented(pillow)
@@ -919,25 +1584,25 @@ def jpeg8_decode(
     data, tables=None, colorspace=None, outcolorspace=None, out=None
 ):
     """Decode JPEG 8-bit."""
-    return pil_decode(data)
+    return pil_decode(data, out=out)
 
 
 @notimplemented(pillow)
 def jpeg2k_decode(data, verbose=0, out=None):
     """Decode JPEG 2000."""
-    return pil_decode(data)
+    return pil_decode(data, out=out)
 
 
 @notimplemented(pillow)
 def webp_decode(data, out=None):
     """Decode WebP."""
-    return pil_decode(data)
+    return pil_decode(data, out=out)
 
 
 @notimplemented(pillow)
 def png_decode(data, out=None):
     """Decode PNG."""
-    return pil_decode(data)
+    return pil_decode(data, out=out)
 
 
 if __name__ == '__main__':
@@ -295,6 +295,14 @@ def test_none():
     assert imagecodecs.none_decode(data) is data
 
 
+def test_none_py():
+    """Test pure Python NOP codec."""
+    data = b'None'
+    assert _imagecodecs.identity is _imagecodecs.none_decode
+    assert _imagecodecs.identity(data) is data
+    assert _imagecodecs.none_encode(data) is data
+
+
 @pytest.mark.skipif(not imagecodecs.BITORDER, reason='Bitorder missing')
 def test_bitorder():
     """Test BitOrder codec with bytes."""
@@ -353,6 +361,29 @@ def test_bitorder_ndarray():
     assert_array_equal(data, reverse)
 
 
+@pytest.mark.parametrize('strided', [False, True])
+@pytest.mark.parametrize('shape', [(7,), (8,), (3, 5), (3, 1), (6, 9)])
+def test_bitorder_py(shape, strided):
+    """Test pure Python BitOrder codec with ndarray."""
+    decode = _imagecodecs.bitorder_decode
+    data = numpy.random.randint(0, 255, shape, dtype='uint8')
+    if strided:
+        base = data
+        data = data[..., ::2]
+        expected = base.copy()
+        expected[..., ::2] = numpy.frombuffer(
+            decode(data.tobytes()), 'uint8'
+        ).reshape(data.shape)
+        assert decode(data) is data
+        assert_array_equal(base, expected)
+    else:
+        reverse = decode(data.tobytes())
+        assert decode(data) is data
+        assert data.tobytes() == reverse
+    data = numpy.array([1, 666], dtype='uint16')
+    assert_array_equal(decode(data), [128, 16473])
+
+
 @pytest.mark.skipif(not imagecodecs.PACKINTS, reason='Packints missing')
 def test_packints_decode():
     """Test PackInts decoder."""
@@ -374,6 +405,30 @@ def test_packints_decode():
     assert tuple(decoded) == (3, 0, 2, 6, 1, 1, 4, 3, 3, 1)
 
 
+@pytest.mark.parametrize('bitspersample', [2, 3, 7, 12, 17, 31])
+@pytest.mark.parametrize('runlen', [0, 1, 5])
+def test_packints_py(bitspersample, runlen):
+    """Test pure Python PackInts decoder."""
+    decode = _imagecodecs.packints_decode
+    dtype = f'u{next(i for i in (1, 2, 4) if 8 * i >= bitspersample)}'
+    data = numpy.random.randint(0, 255, 37, dtype='u1').tobytes()
+    bits = ''.join(f'{byte:08b}' for byte in data)
+    if runlen == 0:
+        runlen = len(bits) // bitspersample
+    skipbits = -runlen * bitspersample % 8
+    rowbits = runlen * bitspersample + skipbits
+    expected = []
+    for row in range(len(bits) // rowbits):
+        row = bits[row * rowbits : (row + 1) * rowbits]
+        expected.extend(
+            int(row[i * bitspersample : (i + 1) * bitspersample], 2)
+            for i in range(runlen)
+        )
+    decoded = decode(data, dtype, bitspersample, runlen)
+    assert decoded.dtype == dtype
+    assert_array_equal(decoded, numpy.array(expected, dtype))
+
+
 PACKBITS_DATA = [
     ([], b''),
     ([0] * 1, b'\x00\x00'),  # literal
@@ -427,12 +482,43 @@ def test_packbits(codec, data):
         assert encode(uncompressed) == compressed
 
 
+@pytest.mark.parametrize('numba', [True, False])
 @pytest.mark.parametrize('data', range(len(PACKBITS_DATA)))
-def test_packbits_py(data):
-    """Test pure Python PackBits decoder."""
+def test_packbits_py(data, numba, monkeypatch):
+    """Test pure Python PackBits codec."""
+    if not numba:
+        monkeypatch.setattr(_imagecodecs, 'numba', None)
+    elif _imagecodecs.numba is None:
+        pytest.skip('numba missing')
     uncompressed, compressed = PACKBITS_DATA[data]
     uncompressed = bytes(uncompressed)
     assert _imagecodecs.packbits_decode(compressed) == uncompressed
+    assert _imagecodecs.packbits_encode(uncompressed) == compressed
+
+
+def test_packbits_encode_axis_py():
+    """Test pure Python PackBits encoder with samples."""
+    encode = _imagecodecs.packbits_encode
+    decode = _imagecodecs.packbits_decode
+    data = numpy.zeros((97, 67, 3), dtype=numpy.int16)
+    data[10:20, 11:21, 1] = -1
+    encoded = encode(data, axis=-1)
+    assert len(encoded) > 10000
+    assert decode(encoded) == data.tobytes()
+    encoded = encode(data, axis=-2)
+    assert len(encoded) < 1200
+    assert decode(encoded) == data.tobytes()
+
+
+def test_packbits_encode_literal_py():
+    """Test pure Python PackBits encoder with long row without runs."""
+    # scanning for the next run must not be quadratic in the row length
+    encode = _imagecodecs.packbits_encode
+    decode = _imagecodecs.packbits_decode
+    data = bytes(range(256)) * 8192
+    encoded = encode(data)
+    assert len(encoded) == len(data) + len(data) // 128
+    assert decode(encoded) == data
 
 
 @pytest.mark.skipif(not imagecodecs.PACKBITS, reason='Packbits missing')
@@ -623,6 +709,36 @@ def test_delta(output, byteorder, kind, codec, func):
                 assert_array_equal(decoded, data)
 
 
+@pytest.mark.parametrize('output', ['new', 'out', 'inplace'])
+@pytest.mark.parametrize('kind', ['u1', 'u2', 'i4', 'u8', 'f4', 'f8', 'B'])
+@pytest.mark.parametrize('byteorder', ['>', '<'])
+@pytest.mark.parametrize('func', ['delta', 'xor'])
+@pytest.mark.parametrize('shape', [(33, 31, 3), (3069,)])
+def test_delta_py(shape, func, byteorder, kind, output):
+    """Test pure Python Delta and XOR delta codecs."""
+    encode = getattr(_imagecodecs, f'{func}_encode')
+    decode = getattr(_imagecodecs, f'{func}_decode')
+
+    data = numpy.random.randint(0, 127, size=33 * 31 * 3, dtype='u1')
+    if kind == 'B':
+        data = data.tobytes()
+        assert decode(encode(data)) == data
+        return
+    data = data.astype(byteorder + kind).reshape(shape)
+    axis = -2 if len(shape) > 1 else -1
+    diff = encode(data, axis=axis)
+    if output == 'new':
+        decoded = decode(diff, axis=axis)
+    elif output == 'out':
+        decoded = numpy.zeros_like(data)
+        decode(diff, axis=axis, out=decoded)
+    else:
+        decoded = diff.copy()
+        decode(decoded, axis=axis, out=decoded)
+    assert decoded.dtype == data.dtype
+    assert_array_equal(decoded, data)
+
+
 @pytest.mark.skipif(not imagecodecs.FLOATPRED, reason='FloatPred missing')
 @pytest.mark.parametrize('output', ['new', 'out'])
 @pytest.mark.parametrize('codec', ['encode', 'decode'])
@@ -719,6 +835,35 @@ def test_floatpred(planar, endian, output, codec):
                     assert_array_equal(out, encoded)
 
 
+@pytest.mark.parametrize('numba', [True, False])
+@pytest.mark.parametrize(
+    'shape', [(33, 31, 3), (3, 11, 31, 3), (33, 1, 31, 3)]
+)
+@pytest.mark.parametrize('output', ['new', 'out'])
+@pytest.mark.parametrize('endian', ['le', 'be'])
+def test_floatpred_py(endian, output, shape, numba, monkeypatch):
+    """Test pure Python FloatPred decoder."""
+    if not numba:
+        monkeypatch.setattr(_imagecodecs, 'numba', None)
+    elif _imagecodecs.numba is None:
+        pytest.skip('numba missing')
+    decode = _imagecodecs.floatpred_decode
+    # rows are encoded independently
+    data = numpy.fromfile(datafiles('rgb.bin'), dtype='<f4').reshape(shape)
+    dtype = '<f4' if endian == 'le' else '>f4'
+    encoded = numpy.fromfile(
+        datafiles(f'rgb.floatpred_{endian}.bin'), dtype=dtype
+    ).reshape(shape)
+    if output == 'new':
+        decoded = decode(encoded, axis=-2)
+    else:
+        out = numpy.zeros(data.shape, dtype)
+        decoded = decode(encoded, axis=-2, out=out)
+        assert decoded is out
+    assert decoded.dtype == dtype
+    assert_array_equal(decoded, data)
+
+
 @pytest.mark.skipif(not imagecodecs.FLOAT24, reason='Float24 missing')
 @pytest.mark.parametrize(
     'f3, f4, f3_expected',
@@ -845,6 +990,39 @@ def test_lzw_msb():
         assert decode(encoded) == decoded
 
 
+@pytest.mark.parametrize('numba', [True, False])
+def test_lzw_py(numba, monkeypatch):
+    """Test pure Python LZW decoder."""
+    if not numba:
+        monkeypatch.setattr(_imagecodecs, 'numba', None)
+    elif _imagecodecs.numba is None:
+        pytest.skip('numba missing')
+    decode = _imagecodecs.lzw_decode
+    assert (
+        decode(
+            b'\x80\x18\xcc&\xe19\xd0@t7\x9dLf\x889\xa0\xd2s'
+        )
+        == b"can't touch this"
+    )
+    encoded = readfile('bytes.lzw_horizontal.bin')
+    decoded = numpy.frombuffer(decode(encoded), 'uint8').reshape(16, 16)
+    assert_array_equal(BYTESIMG, numpy.cumsum(decoded, axis=-1, dtype='u1'))
+    with open(datafiles('image_noeoi.lzw.bin'), 'rb') as fh:
+        encoded = fh.read()
+    with open(datafiles('image_noeoi.bin'), 'rb') as fh:
+        decoded_known = fh.read()
+    decoded = decode(encoded)
+    assert decoded == decoded_known
+    # repeated CLEAR codes are skipped
+    codes = [256, 256] + list(b'hello hello hello') + [257]
+    bits = ''.join(f'{code:09b}' for code in codes)
+    bits += '0' * (-len(bits) % 8)
+    encoded = int(bits, 2).to_bytes(len(bits) // 8, 'big')
+    assert decode(encoded) == b'hello hello hello'
+    with pytest.raises(ValueError):
+        decode(b'\x00\x00\x00\x00')
+
+
 @pytest.mark.skipif(not (imagecodecs.LZW and imagecodecs.DELTA), reason='skip')
 @pytest.mark.parametrize('output', ['new', 'size', 'ndarray', 'bytearray'])
 def test_lzw_decode(output):
@@ -1224,6 +1402,201 @@ def test_compressors(codec, func, output, length):
         raise ValueError(func)
 
 
+@pytest.mark.parametrize(
+    'output',
+    [
+        'new',
+        'bytearray',
+        'out',
+        'size',
+        'excess',
+        'trunc',
+        'small',
+        'unknown',
+        'truncated',
+        'corrupt',
+        'concatenated',
+        'ndarray',
+    ],
+)
+@pytest.mark.parametrize(
+    'codec', ['bz2', 'lzma', 'zlib', 'zlib_deflate', 'zlib_isal']
+)
+def test_compressors_py(codec, output, monkeypatch):
+    """Test pure Python decompressors with output."""
+    if codec.startswith('zlib'):
+        # select zlib backend
+        backend = codec[5:]
+        for module in ('deflate', 'isal'):
+            if module == backend:
+                if getattr(_imagecodecs, module) is None:
+                    pytest.skip(f'{module} missing')
+            else:
+                monkeypatch.setattr(_imagecodecs, module, None)
+        codec = 'zlib'
+    decode = getattr(_imagecodecs, f'{codec}_decode')
+    data = numpy.random.randint(255, size=1021, dtype='uint8').tobytes()
+    encoded = getattr(_imagecodecs, f'{codec}_encode')(data)
+    size = len(data)
+    if output == 'new':
+        ret = decode(encoded)
+        assert isinstance(ret, bytes)
+        assert data == ret
+    elif output == 'bytearray':
+        ret = decode(encoded, out=bytearray)
+        assert isinstance(ret, bytearray)
+        assert data == ret
+    elif output == 'size':
+        ret = decode(encoded, out=size)
+        assert isinstance(ret, bytes)
+        assert data == ret
+        ret = decode(encoded, out=size + 1021)
+        assert isinstance(ret, bytes)
+        assert data == ret
+    elif output == 'out':
+        out = bytearray(size)
+        ret = decode(encoded, out=out)
+        assert ret is out
+        assert data == out
+    elif output == 'excess':
+        out = bytearray(size + 1021)
+        ret = decode(encoded, out=out)
+        assert data == out[:size]
+        assert data == ret
+    elif output == 'trunc':
+        out = bytearray(size - 1)
+        with pytest.raises(RuntimeError):
+            decode(encoded, out=out)
+    elif output == 'small':
+        with pytest.raises(RuntimeError):
+            decode(encoded, out=size - 1)
+    elif output == 'unknown':
+        ret = decode(encoded, out=0)
+        assert isinstance(ret, bytes)
+        assert data == ret
+        with pytest.raises(RuntimeError):
+            decode(encoded, out=bytearray(0))
+    elif output == 'truncated':
+        encoded = encoded[: len(encoded) // 2]
+        error = {
+            'bz2': ValueError,
+            'lzma': _imagecodecs.lzma.LZMAError,
+            'zlib': _imagecodecs.zlib.error,
+        }[codec]
+        with pytest.raises(error):
+            decode(encoded)
+        with pytest.raises(error):
+            decode(encoded, out=size)
+        with pytest.raises(error):
+            decode(encoded, out=bytearray(size))
+    elif output == 'corrupt':
+        encoded = encoded[:2] + bytes(len(encoded) - 2)
+        error = {
+            'bz2': OSError,
+            'lzma': _imagecodecs.lzma.LZMAError,
+            'zlib': _imagecodecs.zlib.error,
+        }[codec]
+        with pytest.raises(error):
+            decode(encoded)
+        with pytest.raises(error):
+            decode(encoded, out=size)
+    elif output == 'concatenated':
+        # bz2 and lzma decode all streams, zlib ignores trailing data
+        encoded += encoded
+        expected = decode(encoded)
+        assert len(expected) == (size if codec == 'zlib' else size * 2)
+        assert decode(encoded, out=size * 2) == expected
+    elif output == 'ndarray':
+        out = numpy.zeros(size + 3, 'uint8')
+        ret = decode(encoded, out=out)
+        assert ret.size == size
+        assert data == out[:size].tobytes()
+
+
+@pytest.mark.skipif(_imagecodecs.lz4 is None, reason='lz4 missing')
+@pytest.mark.parametrize('output', ['new', 'bytearray', 'out', 'size'])
+@pytest.mark.parametrize('header', [False, True])
+@pytest.mark.parametrize('kind', ['random', 'zeros'])
+def test_lz4_py(kind, header, output):
+    """Test pure Python LZ4 decompressor."""
+    encode = _imagecodecs.lz4_encode
+    decode = _imagecodecs.lz4_decode
+    if kind == 'random':
+        data = numpy.random.randint(255, size=1021, dtype='uint8').tobytes()
+    else:
+        data = bytes(100000)
+    encoded = encode(data, header=header)
+    size = len(data)
+    if output == 'new':
+        assert data == decode(encoded, header=header)
+    elif output == 'bytearray':
+        ret = decode(encoded, header=header, out=bytearray)
+        assert isinstance(ret, bytearray)
+        assert data == ret
+    elif output == 'size':
+        assert data == decode(encoded, header=header, out=size)
+    elif output == 'out':
+        out = bytearray(size)
+        ret = decode(encoded, header=header, out=out)
+        assert ret is out
+        assert data == out
+
+
+@pytest.mark.parametrize('numthreads', [None, 1, 3])
+@pytest.mark.parametrize('output', ['new', 'out'])
+@pytest.mark.parametrize(
+    'codec', ['blosc', 'bz2', 'lz4', 'lzma', 'zlib', 'zstd']
+)
+def test_decode_batch_py(codec, output, numthreads):
+    """Test pure Python batch decompressors."""
+    if getattr(_imagecodecs, codec) is None:
+        pytest.skip(f'{codec} missing')
+    encode = getattr(_imagecodecs, f'{codec}_encode')
+    decode_batch = getattr(_imagecodecs, f'{codec}_decode_batch')
+    chunks = [
+        numpy.random.randint(255, size=size, dtype='uint8').tobytes()
+        for size in (0, 1, 1021, 4096, 31 * 33 * 3)
+    ]
+    encoded = [encode(chunk) for chunk in chunks]
+    if output == 'new':
+        decoded = decode_batch(encoded, numthreads=numthreads)
+    else:
+        outs = [bytearray(len(chunk)) for chunk in chunks]
+        # outs and numthreads are positional in all batch decoders
+        decoded = decode_batch(encoded, outs, numthreads)
+        assert outs == chunks
+    assert decoded == chunks
+    with pytest.raises(ValueError):
+        decode_batch(encoded, outs=[None])
+
+
+@pytest.mark.skipif(_imagecodecs.pillow is None, reason='Pillow missing')
+@pytest.mark.parametrize('output', ['new', 'out'])
+@pytest.mark.parametrize('mode', ['L', 'RGB', 'RGBA', 'I;16'])
+def test_pil_py(mode, output):
+    """Test pure Python Pillow decoder."""
+    from PIL import Image
+
+    decode = _imagecodecs.pil_decode
+    if mode == 'I;16':
+        data = numpy.random.randint(2**16, size=(31, 33), dtype='<u2')
+    elif mode == 'L':
+        data = numpy.random.randint(255, size=(31, 33), dtype='uint8')
+    else:
+        data = numpy.random.randint(255, size=(31, 33, len(mode)), dtype='u1')
+    img = Image.frombytes(mode, (33, 31), data.tobytes())
+    with io.BytesIO() as fh:
+        img.save(fh, format='PNG')
+        encoded = fh.getvalue()
+    if output == 'new':
+        decoded = decode(encoded)
+    else:
+        decoded = numpy.zeros_like(data)
+        ret = decode(encoded, out=decoded)
+        assert ret is decoded
+    assert_array_equal(decoded, data)
+
+
 @pytest.mark.skipif(not imagecodecs.BITSHUFFLE, reason='bitshuffle missing')
 @pytest.mark.parametrize('dtype', ['bytes', 'ndarray'])
 @pytest.mark.parametrize('itemsize', [1, 2, 4, 8])